@@ -1,4 +1,5 @@
 from flask import Flask, request, jsonify, send_from_directory, send_file, session
+import joblib
 import pickle
 import sys
 import json as _json
@@ -12,6 +13,13 @@ import xgboost as xgb
 import shap
 from functools import wraps
 
+# orjson skips the stdlib JSON parser — matters most for the large
+# /api/explain payloads; stdlib json is the fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Ensure both Frontend/ (for database.py) and src/ are importable
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 _SRC_DIR = os.path.join(BASE_DIR, '..', 'src')
@@ -50,15 +58,27 @@ MODEL_PATHS = {
 # Initialize dictionary to store models (single shared pipeline now)
 models = {}
 
+_models_loaded = False
+
 def load_models():
-    """Load all models from files (all use the shared notebook pipeline)."""
+    """Load all models from files (all use the shared notebook pipeline).
+
+    Idempotent: the estimators live once per process. Launching via
+    ``python app.py`` used to unpickle all 9 models twice (once at import
+    for the gunicorn path, again in __main__); repeat calls now no-op.
+    """
+    global _models_loaded
+    if _models_loaded:
+        return
     try:
         for model_name, path in MODEL_PATHS.items():
             if os.path.exists(path):
                 with warnings.catch_warnings():
                     warnings.simplefilter("ignore", category=UserWarning)
-                    with open(path, 'rb') as file:
-                        models[model_name] = pickle.load(file)
+                    # mmap keeps estimator arrays backed by the page cache
+                    # (shared across workers); joblib falls back transparently
+                    # for plain-pickle files
+                    models[model_name] = joblib.load(path, mmap_mode='r')
                 logger.info(f"Loaded {model_name} from {os.path.basename(path)}")
             else:
                 logger.warning(f"Model file not found: {path}")
@@ -67,6 +87,7 @@ def load_models():
         raise
     # Load the shared notebook preprocessing pipeline
     _load_notebook_pipeline()
+    _models_loaded = True
 
 # All 24 feature names in the exact notebook CSV column order
 ALL_FEATURES = [
@@ -79,26 +100,72 @@ CATEGORICAL_FEATURES = ['rbc', 'pc', 'pcc', 'ba', 'pcv', 'wc', 'rc',
                          'htn', 'dm', 'cad', 'appet', 'pe', 'ane']
 NUMERICAL_FEATURES   = [f for f in ALL_FEATURES if f not in CATEGORICAL_FEATURES]
 
+# Common aliases for categorical form values that don't match a trained
+# LabelEncoder class exactly (module constant — built once, not per feature)
+_ALIAS_MAP = {
+    'yes': ['yes', 'y', '1', 'true'],
+    'no':  ['no',  'n', '0', 'false'],
+    'normal': ['normal', 'norm'],
+    'abnormal': ['abnormal', 'abn'],
+    'present': ['present', 'yes', '1'],
+    'notpresent': ['notpresent', 'not present', 'no', '0'],
+    'good': ['good', 'yes'],
+    'poor': ['poor', 'no'],
+}
+
+# Display name → JS-ready snake_case key (module constant — built once,
+# not per request)
+_NAME_MAP = {
+    "Logistic Regression": "logistic_regression",
+    "SVM":                 "svm",
+    "Decision Tree":       "decision_tree",
+    "Random Forest":       "random_forest",
+    "Gradient Boosting":   "gradient_boosting",
+    "XGBoost":             "xgboost",
+    "CatBoost":            "catboost",
+    "K-Nearest Neighbors": "knn",
+    "Naive Bayes":         "naive_bayes",
+}
+
 # Shared notebook preprocessing pipeline — loaded once at startup
 _le_dict     = {}   # {col: LabelEncoder}
+_le_classes_lower = {}   # {col: {lowered class: canonical class}} — built once
 _knn_imputer = None
 _nb_scaler   = None
 
 def _load_notebook_pipeline():
-    """Load le_dict, knn_imputer, and scaler from models/."""
+    """Load le_dict, knn_imputer, and scaler from models/.
+
+    Prefers the fused ``preprocess_pipeline.pkl`` (imputer → scaler in one
+    sklearn Pipeline, one deserialization) and falls back to the two
+    separate pickles for older model directories.
+    """
     global _le_dict, _knn_imputer, _nb_scaler
 
-    le_path  = os.path.join(_MODELS_DIR, 'le_dict.pkl')
-    imp_path = os.path.join(_MODELS_DIR, 'knn_imputer.pkl')
-    sc_path  = os.path.join(_MODELS_DIR, 'scaler.pkl')
+    le_path   = os.path.join(_MODELS_DIR, 'le_dict.pkl')
+    pipe_path = os.path.join(_MODELS_DIR, 'preprocess_pipeline.pkl')
+    imp_path  = os.path.join(_MODELS_DIR, 'knn_imputer.pkl')
+    sc_path   = os.path.join(_MODELS_DIR, 'scaler.pkl')
 
     if os.path.exists(le_path):
         with open(le_path, 'rb') as f:
             _le_dict = pickle.load(f)
+        # Case-insensitive class lookup tables, built once instead of per request
+        _le_classes_lower.clear()
+        for col, le in _le_dict.items():
+            _le_classes_lower[col] = {c.lower(): c for c in le.classes_}
         logger.info(f"le_dict loaded ({len(_le_dict)} categorical encoders)")
     else:
         logger.warning("le_dict.pkl not found — categorical encoding will be numeric fallback")
 
+    if os.path.exists(pipe_path):
+        with open(pipe_path, 'rb') as f:
+            pipe = pickle.load(f)
+        _knn_imputer = pipe.named_steps['imputer']
+        _nb_scaler   = pipe.named_steps['scaler']
+        logger.info("preprocess_pipeline loaded (imputer → scaler)")
+        return
+
     if os.path.exists(imp_path):
         with open(imp_path, 'rb') as f:
             _knn_imputer = pickle.load(f)
@@ -132,26 +199,15 @@ def preprocess_features(form_data):
                 # ── Categorical: use LabelEncoder fitted on training data ──
                 v = str(value).strip().lower() if value is not None else ''
                 le = _le_dict[feat]
-                # Case-insensitive match against known classes
-                classes_lower = {c.lower(): c for c in le.classes_}
+                # Case-insensitive match against known classes (precomputed)
+                classes_lower = _le_classes_lower[feat]
                 canonical = classes_lower.get(v)
                 if canonical is not None:
                     encoded = int(le.transform([canonical])[0])
                 else:
-                    # Fallback: nearest class by string distance
-                    # Common aliases
-                    alias_map = {
-                        'yes': ['yes', 'y', '1', 'true'],
-                        'no':  ['no',  'n', '0', 'false'],
-                        'normal': ['normal', 'norm'],
-                        'abnormal': ['abnormal', 'abn'],
-                        'present': ['present', 'yes', '1'],
-                        'notpresent': ['notpresent', 'not present', 'no', '0'],
-                        'good': ['good', 'yes'],
-                        'poor': ['poor', 'no'],
-                    }
+                    # Fallback: match against common aliases
                     found = False
-                    for cls, aliases in alias_map.items():
+                    for cls, aliases in _ALIAS_MAP.items():
                         if v in aliases and cls in classes_lower:
                             encoded = int(le.transform([classes_lower[cls]])[0])
                             found = True
@@ -187,50 +243,76 @@ def preprocess_features(form_data):
         logger.error(f"Error in preprocessing features: {str(e)}")
         raise
 
+def _json_body():
+    """Parse the request body to a dict in one pass.
+
+    Returns None when the body is empty or not valid JSON so endpoints
+    that compute from the payload can reject it outright; form-style
+    endpoints fall back with ``_json_body() or {}``.
+    """
+    raw = request.get_data(cache=True)
+    if not raw:
+        return None
+    try:
+        parsed = orjson.loads(raw) if orjson is not None else _json.loads(raw)
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
     """API endpoint for predictions"""
     try:
-        features = preprocess_features(request.json)
-        predictions = {}
-        
-        for model_name, model in models.items():
+        # Guard up front instead of letting the ensemble math divide by zero
+        if not models:
+            return jsonify({
+                'status': 'error',
+                'message': 'No models loaded'
+            }), 503
+
+        body = _json_body()
+        if body is None:
+            # Never predict from a garbage payload — an empty feature set
+            # would be silently imputed into a confident verdict
+            return jsonify({
+                'status': 'error',
+                'message': 'Request body must be a JSON object of medical parameters'
+            }), 400
+
+        features = preprocess_features(body)
+
+        # Collect per-model outputs into flat arrays so the ensemble math
+        # below is pure NumPy instead of repeated Python passes over dicts.
+        # NaN confidence marks a model whose predict failed.
+        names = list(models)
+        preds = np.zeros(len(names), dtype=np.int64)
+        confs = np.full(len(names), np.nan)
+
+        for i, (model_name, model) in enumerate(models.items()):
             # All models share the same notebook-pipeline scaled features
-            prediction = None
-            confidence = None
-
             try:
-                prediction = int(model.predict(features)[0])
+                preds[i] = int(model.predict(features)[0])
                 proba = model.predict_proba(features)[0]
-                confidence = round(float(max(proba)) * 100, 2)
+                confs[i] = round(float(max(proba)) * 100, 2)
             except Exception as exc:
                 logger.warning(f"{model_name} predict failed: {exc}")
-                prediction = 0
-                confidence = None
 
-            predictions[model_name] = {
-                'prediction': int(prediction),
-                'confidence': confidence,
-                'label': "CKD" if prediction == 1 else "Not CKD"
+        predictions = {
+            name: {
+                'prediction': int(preds[i]),
+                'confidence': None if np.isnan(confs[i]) else float(confs[i]),
+                'label': "CKD" if preds[i] == 1 else "Not CKD"
             }
-
-        # ── Ensemble consensus ────────────────────────────────────────────
-        _NAME_MAP = {
-            "Logistic Regression": "logistic_regression",
-            "SVM":                 "svm",
-            "Decision Tree":       "decision_tree",
-            "Random Forest":       "random_forest",
-            "Gradient Boosting":   "gradient_boosting",
-            "XGBoost":             "xgboost",
-            "CatBoost":            "catboost",
-            "K-Nearest Neighbors": "knn",
-            "Naive Bayes":         "naive_bayes",
+            for i, name in enumerate(names)
         }
-        ckd_votes = sum(1 for p in predictions.values() if p['prediction'] == 1)
-        total     = len(predictions)
+
+        # ── Ensemble consensus (vectorized) ───────────────────────────────
+        ckd_votes = int(preds.sum())
+        total     = len(names)
         ensemble_ckd = ckd_votes > total / 2
-        confs = [p['confidence'] for p in predictions.values() if p['confidence'] is not None]
-        avg_conf = sum(confs) / len(confs) if confs else 50.0
+        valid = ~np.isnan(confs)
+        avg_conf = float(confs[valid].mean()) if valid.any() else 50.0
 
         # JS-ready model_results: snake_case keys, 'ckd'/'no_ckd', confidence 0-1
         model_results = {
@@ -257,11 +339,39 @@ def api_predict():
             'message': str(e)
         }), 500
 
+# Memoized SHAP explanations keyed by the preprocessed feature vector.
+# KernelExplainer alone takes seconds per request, so repeat explains for
+# the same patient (e.g. model-selector changes, page revisits) should be
+# served from memory. Bounded LRU: oldest entry evicted past 64.
+_explain_cache = {}
+_EXPLAIN_CACHE_MAX = 64
+
+
 @app.route('/api/explain', methods=['POST'])
 def api_explain():
     """Return SHAP feature-importance values for each model."""
     try:
-        features = preprocess_features(request.json)
+        if not models:
+            return jsonify({
+                'status': 'error',
+                'message': 'No models loaded'
+            }), 503
+
+        body = _json_body()
+        if body is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Request body must be a JSON object of medical parameters'
+            }), 400
+
+        features = preprocess_features(body)
+
+        cache_key = features.tobytes()
+        cached = _explain_cache.pop(cache_key, None)
+        if cached is not None:
+            _explain_cache[cache_key] = cached   # re-insert as most recent
+            return jsonify({"status": "success", "explanations": cached})
+
         explanations = {}
 
         # Models that support TreeExplainer (fast, exact)
@@ -309,20 +419,31 @@ def api_explain():
                 else:
                     vals = sv_arr.flatten()
 
-                vals = np.array(vals).flatten()[:len(ALL_FEATURES)]
-
-                shap_dict = {
-                    ALL_FEATURES[i]: round(float(vals[i]), 5)
-                    for i in range(len(vals))
-                }
-                # Sort by absolute magnitude descending
-                explanations[model_name] = dict(
-                    sorted(shap_dict.items(), key=lambda x: abs(x[1]), reverse=True)
+                # Round in one vectorized pass instead of per-element float()
+                vals = np.round(
+                    np.asarray(vals, dtype=np.float64).flatten()[:len(ALL_FEATURES)],
+                    5,
                 )
+                # Order by absolute magnitude descending with one vectorized
+                # argsort. (All 24 features go back to the client, so a
+                # partial argpartition would save nothing at this size.)
+                order = np.argsort(-np.abs(vals), kind='stable')
+                vals_list = vals.tolist()
+                explanations[model_name] = {
+                    ALL_FEATURES[i]: vals_list[i] for i in order
+                }
             except Exception as exc:
                 logger.warning(f"SHAP failed for {model_name}: {exc}")
                 explanations[model_name] = {"error": str(exc)}
 
+        # Only memoize fully successful results — caching a transient SHAP
+        # failure would replay the error until LRU eviction, where the
+        # uncached path recovers on the next request.
+        if explanations and not any("error" in v for v in explanations.values()):
+            if len(_explain_cache) >= _EXPLAIN_CACHE_MAX:
+                _explain_cache.pop(next(iter(_explain_cache)))   # evict oldest
+            _explain_cache[cache_key] = explanations
+
         return jsonify({"status": "success", "explanations": explanations})
 
     except Exception as e:
@@ -359,7 +480,7 @@ def spa_root():
 # ── Auth ─────────────────────────────────────────────────────────────────────
 @app.route('/api/auth/login', methods=['POST'])
 def api_login():
-    data = request.get_json(force=True) or {}
+    data = _json_body() or {}
     from database import authenticate_user
     user = authenticate_user(data.get('username', ''), data.get('password', ''))
     if user:
@@ -397,7 +518,7 @@ def api_patients():
     from database import get_all_patients, save_patient
     if request.method == 'GET':
         return jsonify({'status': 'success', 'patients': get_all_patients()})
-    data = request.get_json(force=True) or {}
+    data = _json_body() or {}
     ok, msg = save_patient(data, session['user']['username'])
     return jsonify({'status': 'success' if ok else 'error', 'message': msg})
 
@@ -412,7 +533,7 @@ def api_patient(patient_id):
             return jsonify({'status': 'success', 'patient': p})
         return jsonify({'status': 'error', 'message': 'Patient not found'}), 404
     if request.method == 'PUT':
-        ok, msg = update_patient(patient_id, request.get_json(force=True) or {})
+        ok, msg = update_patient(patient_id, _json_body() or {})
         return jsonify({'status': 'success' if ok else 'error', 'message': msg})
     ok, msg = delete_patient(patient_id)
     return jsonify({'status': 'success' if ok else 'error', 'message': msg})
@@ -438,7 +559,7 @@ def api_users():
     from database import get_all_users, add_user
     if request.method == 'GET':
         return jsonify({'status': 'success', 'users': get_all_users()})
-    d = request.get_json(force=True) or {}
+    d = _json_body() or {}
     ok, msg = add_user(d.get('username', ''), d.get('password', ''), d.get('full_name', ''), d.get('role', 'doctor'), d.get('email', ''))
     return jsonify({'status': 'success' if ok else 'error', 'message': msg})
 
@@ -449,7 +570,7 @@ def api_user(username):
         return err
     from database import update_user, delete_user
     if request.method == 'PUT':
-        d = request.get_json(force=True) or {}
+        d = _json_body() or {}
         ok, msg = update_user(username, d.get('full_name', ''), d.get('role', 'doctor'), d.get('email', ''))
         return jsonify({'status': 'success' if ok else 'error', 'message': msg})
     ok, msg = delete_user(username)
@@ -461,7 +582,7 @@ def api_change_password():
     if 'user' not in session:
         return jsonify({'status': 'error', 'message': 'Not authenticated'}), 401
     from database import change_password
-    d = request.get_json(force=True) or {}
+    d = _json_body() or {}
     ok, msg = change_password(session['user']['username'], d.get('old_password', ''), d.get('new_password', ''))
     return jsonify({'status': 'success' if ok else 'error', 'message': msg})
 
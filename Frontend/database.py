@@ -5,9 +5,29 @@ SQLite-backed storage for users, patients, and predictions.
 
 import sqlite3
 import hashlib
+import json
 import os
 from datetime import datetime
 
+# orjson is a drop-in speedup for the model_results / medical_params blobs;
+# fall back to stdlib json when it isn't installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _json_loads(s):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
 DB_PATH = os.path.join(os.path.dirname(__file__), "ckd_clinical.db")
 
 
@@ -99,21 +119,74 @@ def init_db():
 
 # ── User operations ─────────────────────────────────────────────────────────
 
+# Short-lived memo of successful logins keyed by (username, password hash).
+# Only successes are cached (failed/brute attempts always hit the DB), and
+# any credential or account change clears the memo.
+_AUTH_CACHE_TTL = 60          # seconds
+_AUTH_CACHE_MAX = 50          # entries
+_auth_cache = {}              # {(username, pwd_hash): (expiry, user_dict)}
+
+
+def _auth_cache_clear():
+    _auth_cache.clear()
+
+
 def authenticate_user(username: str, password: str):
     """Return user row on success, None on failure."""
+    pwd_hash = hash_password(password)
+    key = (username, pwd_hash)
+    cached = _auth_cache.get(key)
+    if cached is not None and cached[0] > datetime.now().timestamp():
+        return dict(cached[1])
+
     conn = get_connection()
     user = conn.execute(
         "SELECT * FROM users WHERE username = ? AND password = ?",
-        (username, hash_password(password))
+        (username, pwd_hash)
     ).fetchone()
     conn.close()
-    return dict(user) if user else None
+    if not user:
+        return None
+
+    user = dict(user)
+    if len(_auth_cache) >= _AUTH_CACHE_MAX:
+        _auth_cache.clear()   # cheap wholesale eviction — entries age out anyway
+    _auth_cache[key] = (datetime.now().timestamp() + _AUTH_CACHE_TTL, user)
+    return dict(user)
+
+
+# Short TTL memo for the list reads that back the admin tables — every page
+# interaction re-requests them, so skip the DB round-trip for the common
+# case. Mutations invalidate immediately; the TTL only bounds staleness
+# from out-of-band writes (e.g. a second process on the same DB file).
+_LIST_CACHE_TTL = 30          # seconds
+_list_cache = {}              # {"patients"|"users": (expiry, rows)}
+
+
+def _list_cache_get(key):
+    cached = _list_cache.get(key)
+    if cached is not None and cached[0] > datetime.now().timestamp():
+        return cached[1]
+    return None
+
+
+def _list_cache_put(key, rows):
+    _list_cache[key] = (datetime.now().timestamp() + _LIST_CACHE_TTL, rows)
+    return rows
+
+
+def _list_cache_clear(key):
+    _list_cache.pop(key, None)
 
 
 def get_all_users():
+    cached = _list_cache_get("users")
+    if cached is not None:
+        return [dict(r) for r in cached]
     conn = get_connection()
     rows = conn.execute("SELECT id, username, full_name, role, email, created_at FROM users").fetchall()
     conn.close()
+    _list_cache_put("users", [dict(r) for r in rows])
     return [dict(r) for r in rows]
 
 
@@ -125,6 +198,7 @@ def add_user(username, password, full_name, role, email):
             (username, hash_password(password), full_name, role, email)
         )
         conn.commit()
+        _list_cache_clear("users")
         return True, "User created successfully."
     except sqlite3.IntegrityError:
         return False, "Username already exists."
@@ -147,13 +221,30 @@ def change_password(username, old_password, new_password):
     )
     conn.commit()
     conn.close()
+    _auth_cache_clear()
     return True, "Password changed successfully."
 
 
 # ── Patient operations ───────────────────────────────────────────────────────
 
+def _age_from_dob(dob_str):
+    """Compute age in whole years from an ISO date-of-birth string.
+
+    Branchless: the (month, day) tuple comparison yields 0/1 directly,
+    so no conditional is needed. Returns None if the date can't be parsed.
+    """
+    try:
+        dob = datetime.strptime(str(dob_str)[:10], "%Y-%m-%d")
+    except (ValueError, TypeError):
+        return None
+    today = datetime.now()
+    return (today.year - dob.year) - ((today.month, today.day) < (dob.month, dob.day))
+
+
 def save_patient(data: dict, registered_by: str):
     """Insert a patient record. Returns (True, patient_id) or (False, error_msg)."""
+    if not data.get("age") and data.get("date_of_birth"):
+        data = {**data, "age": _age_from_dob(data["date_of_birth"])}
     conn = get_connection()
     try:
         conn.execute("""
@@ -167,6 +258,7 @@ def save_patient(data: dict, registered_by: str):
                :department, :registered_by)
         """, {**data, "registered_by": registered_by})
         conn.commit()
+        _list_cache_clear("patients")
         return True, data["patient_id"]
     except sqlite3.IntegrityError:
         return False, f"Patient ID '{data['patient_id']}' already exists."
@@ -182,11 +274,15 @@ def get_patient(patient_id: str):
 
 
 def get_all_patients():
+    cached = _list_cache_get("patients")
+    if cached is not None:
+        return [dict(r) for r in cached]
     conn = get_connection()
     rows = conn.execute(
         "SELECT patient_id, first_name, last_name, age, gender, physician, registration_date FROM patients ORDER BY registration_date DESC"
     ).fetchall()
     conn.close()
+    _list_cache_put("patients", [dict(r) for r in rows])
     return [dict(r) for r in rows]
 
 
@@ -203,6 +299,7 @@ def update_patient(patient_id: str, data: dict):
             WHERE patient_id=:patient_id
         """, {**data, "patient_id": patient_id})
         conn.commit()
+        _list_cache_clear("patients")
         return True, "Patient updated successfully."
     except Exception as e:
         return False, str(e)
@@ -217,6 +314,8 @@ def delete_patient(patient_id: str):
         conn.execute("DELETE FROM predictions WHERE patient_id=?", (patient_id,))
         conn.execute("DELETE FROM patients WHERE patient_id=?", (patient_id,))
         conn.commit()
+        _list_cache_clear("patients")
+        _pred_cache_clear(patient_id)
         return True, "Patient and all associated records deleted."
     except Exception as e:
         return False, str(e)
@@ -230,6 +329,8 @@ def delete_user(username: str):
     try:
         conn.execute("DELETE FROM users WHERE username=?", (username,))
         conn.commit()
+        _auth_cache_clear()
+        _list_cache_clear("users")
         return True, f"User '{username}' deleted."
     except Exception as e:
         return False, str(e)
@@ -246,6 +347,8 @@ def update_user(username: str, full_name: str, role: str, email: str):
             (full_name, role, email, username)
         )
         conn.commit()
+        _auth_cache_clear()
+        _list_cache_clear("users")
         return True, "User updated successfully."
     except Exception as e:
         return False, str(e)
@@ -255,9 +358,29 @@ def update_user(username: str, full_name: str, role: str, email: str):
 
 # ── Prediction operations ───────────────────────────────────────────────────
 
+# Per-patient memo of decoded prediction history — repeat views of the
+# same patient skip both the DB query and the JSON decode of the
+# model_results/medical_params blobs. Bounded and TTL'd; saving a new
+# prediction or deleting the patient invalidates the entry.
+_PRED_CACHE_TTL = 60          # seconds
+_PRED_CACHE_MAX = 256         # patients
+_pred_cache = {}              # {patient_id: (expiry, results)}
+
+
+def _pred_cache_clear(patient_id=None):
+    if patient_id is None:
+        _pred_cache.clear()
+    else:
+        _pred_cache.pop(patient_id, None)
+
+
 def save_prediction(patient_id, ensemble_result, ensemble_conf, ckd_detected,
                     model_results_json, medical_params_json, performed_by):
-    import json
+    # Accept dicts as well as pre-serialized JSON strings
+    if not isinstance(model_results_json, str):
+        model_results_json = _json_dumps(model_results_json)
+    if not isinstance(medical_params_json, str):
+        medical_params_json = _json_dumps(medical_params_json)
     conn = get_connection()
     conn.execute("""
         INSERT INTO predictions
@@ -268,10 +391,14 @@ def save_prediction(patient_id, ensemble_result, ensemble_conf, ckd_detected,
           model_results_json, medical_params_json, performed_by))
     conn.commit()
     conn.close()
+    _pred_cache_clear(patient_id)
 
 
 def get_patient_predictions(patient_id: str):
-    import json
+    cached = _pred_cache.get(patient_id)
+    if cached is not None and cached[0] > datetime.now().timestamp():
+        return cached[1]
+
     conn = get_connection()
     rows = conn.execute(
         "SELECT * FROM predictions WHERE patient_id = ? ORDER BY prediction_date DESC",
@@ -282,11 +409,15 @@ def get_patient_predictions(patient_id: str):
     for r in rows:
         d = dict(r)
         try:
-            d["model_results"] = json.loads(d["model_results"])
-            d["medical_params"] = json.loads(d["medical_params"])
+            d["model_results"] = _json_loads(d["model_results"])
+            d["medical_params"] = _json_loads(d["medical_params"])
         except Exception:
             pass
         results.append(d)
+
+    if len(_pred_cache) >= _PRED_CACHE_MAX:
+        _pred_cache.clear()   # cheap wholesale eviction — entries age out anyway
+    _pred_cache[patient_id] = (datetime.now().timestamp() + _PRED_CACHE_TTL, results)
     return results
 
 
@@ -4,6 +4,15 @@
 
 'use strict';
 
+// Feature code → short label for the submitted-parameters summary
+const PARAM_LABELS = {
+  age:'Age', bp:'Blood Pressure', sg:'Specific Gravity', al:'Albumin', su:'Sugar',
+  rbc:'Red Blood Cells', pc:'Pus Cells', pcc:'Pus Cell Clumps', ba:'Bacteria',
+  bgr:'Blood Glucose', bu:'Blood Urea', sc:'Serum Creatinine', sod:'Sodium',
+  pot:'Potassium', hemo:'Haemoglobin', pcv:'PCV', wc:'WBC Count', rc:'RBC Count',
+  htn:'Hypertension', dm:'Diabetes', cad:'CAD', appet:'Appetite', pe:'Pedal Edema', ane:'Anaemia',
+};
+
 // ── State ──────────────────────────────────────────────────────────────────
 const STATE = {
   user: null,
@@ -368,6 +377,24 @@ async function handleMedicalParams(e) {
 // ═══════════════════════════════════════════════════════════════════════════
 //  RESULTS RENDERER
 // ═══════════════════════════════════════════════════════════════════════════
+
+// Numeric view of a medical-params object, computed once per submission.
+// Downstream consumers (KDIGO staging, the range-deviation plot) index
+// this directly instead of re-running parseFloat on every render.
+const _numParamsCache = new WeakMap();
+function numericParams(params) {
+  let nums = _numParamsCache.get(params);
+  if (!nums) {
+    nums = {};
+    for (const [k, v] of Object.entries(params)) {
+      const f = parseFloat(v);
+      if (!Number.isNaN(f)) nums[k] = f;
+    }
+    _numParamsCache.set(params, nums);
+  }
+  return nums;
+}
+
 function renderResults(res, params) {
   const container = document.getElementById('results-content');
   const isCKD = res.ensemble_result === 'ckd';
@@ -412,8 +439,9 @@ function renderResults(res, params) {
   </div>`;
 
   // ── KDIGO Stage (all roles) ─────────────────────────────────────────────
-  const sc = parseFloat(params.sc) || null;
-  const age = parseFloat(params.age) || null;
+  const nums = numericParams(params);
+  const sc = nums.sc || null;
+  const age = nums.age || null;
   const genderStr = (STATE.currentPatient?.gender || params.gender || 'Male');
   if (sc !== null && age !== null) {
     const kdigo = computeKDIGO(sc, age, genderStr);
@@ -461,15 +489,7 @@ function renderResults(res, params) {
   html += `<h3 class="section-title" style="margin-top:1.5rem">Submitted Parameters</h3>
   <div class="params-summary-grid">`;
 
-  const paramLabels = {
-    age:'Age', bp:'Blood Pressure', sg:'Specific Gravity', al:'Albumin', su:'Sugar',
-    rbc:'Red Blood Cells', pc:'Pus Cells', pcc:'Pus Cell Clumps', ba:'Bacteria',
-    bgr:'Blood Glucose', bu:'Blood Urea', sc:'Serum Creatinine', sod:'Sodium',
-    pot:'Potassium', hemo:'Haemoglobin', pcv:'PCV', wc:'WBC Count', rc:'RBC Count',
-    htn:'Hypertension', dm:'Diabetes', cad:'CAD', appet:'Appetite', pe:'Pedal Edema', ane:'Anaemia',
-  };
-
-  for (const [k, label] of Object.entries(paramLabels)) {
+  for (const [k, label] of Object.entries(PARAM_LABELS)) {
     const val = params[k];
     if (val !== undefined && val !== '') {
       html += `<div class="param-summary-item">
@@ -514,27 +534,30 @@ function renderNurseChecklist(isCKD) {
   <div class="card" style="padding:1.5rem; margin-top:1rem">
     <h3 class="card-header-title">Nursing Care Checklist</h3>
     <ul style="list-style:none;display:flex;flex-direction:column;gap:.6rem">
-      ${items.map(i => `<li style="display:flex;gap:.6rem;align-items:flex-start">
-        <input type="checkbox" style="margin-top:.15em;flex-shrink:0" />
-        <span style="font-size:.875rem">${i}</span>
+      ${items.map((item, i) => `<li style="display:flex;gap:.6rem;align-items:flex-start">
+        <input type="checkbox" id="nurse-check-${i}" style="margin-top:.15em;flex-shrink:0" />
+        <label for="nurse-check-${i}" style="font-size:.875rem">${item}</label>
       </li>`).join('')}
     </ul>
   </div>`;
 }
 
+// snake_case model key → display name (module constant — one hash lookup
+// per call instead of rebuilding the dict)
+const MODEL_DISPLAY_NAME = {
+  'logistic_regression':'Logistic Regression',
+  'svm':'SVM',
+  'decision_tree':'Decision Tree',
+  'random_forest':'Random Forest',
+  'gradient_boosting':'Gradient Boosting',
+  'xgboost':'XGBoost',
+  'catboost':'CatBoost',
+  'knn':'KNN',
+  'naive_bayes':'Naive Bayes',
+};
+
 function formatModelName(key) {
-  const names = {
-    'logistic_regression':'Logistic Regression',
-    'svm':'SVM',
-    'decision_tree':'Decision Tree',
-    'random_forest':'Random Forest',
-    'gradient_boosting':'Gradient Boosting',
-    'xgboost':'XGBoost',
-    'catboost':'CatBoost',
-    'knn':'KNN',
-    'naive_bayes':'Naive Bayes',
-  };
-  return names[key] || key;
+  return MODEL_DISPLAY_NAME[key] || key;
 }
 
 // ═══════════════════════════════════════════════════════════════════════════
@@ -594,6 +617,11 @@ const FEAT_LABEL = {
   wc:'White Cell Count', rc:'Red Cell Count', htn:'Hypertension', dm:'Diabetes',
   cad:'Coronary Artery Disease', appet:'Appetite', pe:'Pedal Oedema', ane:'Anaemia'
 };
+// Canonical display spellings for categorical values (submitted-params card)
+const VALUE_DISPLAY = {
+  normal:'Normal', abnormal:'Abnormal', present:'Present', notpresent:'Not Present',
+  yes:'Yes', no:'No', good:'Good', poor:'Poor',
+};
 // Clinical normal ranges for numeric parameters (for Plot 5)
 const CLINICAL_RANGES = {
   hemo: { label:'Haemoglobin',        unit:'g/dl',    min:13,    max:17    },
@@ -619,9 +647,20 @@ async function generateShap() {
     const payload = { ...STATE.medicalParams };
     if (STATE.currentPatient?.patient_id) payload.patient_id = STATE.currentPatient.patient_id;
 
+    // Same inputs as the last explain → reuse the cached explanations
+    // instead of re-running the multi-second SHAP pass server-side.
+    const paramsKey = JSON.stringify(payload);
+    if (STATE.shapExplanations && STATE._shapParamsKey === paramsKey) {
+      renderShap(STATE.shapExplanations);
+      document.getElementById('shap-section').classList.remove('hidden');
+      document.getElementById('generate-shap-btn').classList.add('hidden');
+      return;
+    }
+
     const res = await api('/api/explain', { method: 'POST', body: payload });
     if (res.status === 'success' && res.explanations) {
       STATE.shapExplanations = res.explanations;
+      STATE._shapParamsKey = paramsKey;
       renderShap(res.explanations);
       document.getElementById('shap-section').classList.remove('hidden');
       document.getElementById('generate-shap-btn').classList.add('hidden');
@@ -657,24 +696,89 @@ function reRenderShap() {
     showToast(`SHAP data not available for ${modelName}`, 'error');
     return;
   }
+  // Skip the five-plot rebuild when the selected model and underlying
+  // explanation set haven't changed (e.g. redundant change events).
+  const last = STATE._lastShapRender;
+  if (last && last.modelName === modelName &&
+      last.explanations === STATE.shapExplanations &&
+      last.params === STATE.medicalParams) {
+    return;
+  }
+  STATE._lastShapRender = {
+    modelName,
+    explanations: STATE.shapExplanations,
+    params: STATE.medicalParams,
+  };
   renderShapPlots(modelName, shapData, STATE.medicalParams || {});
 }
 
+/* Live CSS custom-property palette, memoized per theme — the computed-style
+   reads only happen on the first render after a theme switch, not on every
+   plot rebuild. */
+const _cssPaletteCache = {};
+function _cssPalette() {
+  const theme = document.documentElement.getAttribute('data-theme') || 'light';
+  let pal = _cssPaletteCache[theme];
+  if (!pal) {
+    const cs = getComputedStyle(document.documentElement);
+    pal = _cssPaletteCache[theme] = {
+      cRed:     cs.getPropertyValue('--c-red').trim()          || '#e63946',
+      cPrimary: cs.getPropertyValue('--c-primary').trim()      || '#1B6CA8',
+      cAccent:  cs.getPropertyValue('--c-accent').trim()       || '#00C9B8',
+      cSurface: cs.getPropertyValue('--surface').trim()        || '#ffffff',
+      cSurf2:   cs.getPropertyValue('--surface-2').trim()      || '#f7f9fb',
+      cBg:      cs.getPropertyValue('--bg').trim()             || '#f0f4f8',
+      cBorder:  cs.getPropertyValue('--border').trim()         || '#dce3ea',
+      cText:    cs.getPropertyValue('--text').trim()           || '#1a2332',
+      cMuted:   cs.getPropertyValue('--text-muted').trim()     || '#6b7a8d',
+      cPriDark: cs.getPropertyValue('--c-primary-dark').trim() || '#124e7c',
+    };
+  }
+  return pal;
+}
+
+/* Shared Plotly layout base, axis styling, and configs, memoized per theme —
+   the five figures spread these instead of each render rebuilding them. */
+const _plotChromeCache = {};
+function _plotChrome() {
+  const theme = document.documentElement.getAttribute('data-theme') || 'light';
+  let chrome = _plotChromeCache[theme];
+  if (!chrome) {
+    const { cSurf2, cBorder, cText, cMuted } = _cssPalette();
+    chrome = _plotChromeCache[theme] = {
+      layoutBase: {
+        paper_bgcolor: 'rgba(0,0,0,0)', // fully transparent — card provides background
+        plot_bgcolor:  cSurf2,
+        font: { family: 'Inter, system-ui, sans-serif', size: 12, color: cText },
+        margin: { t: 30, r: 80, b: 60, l: 170 },
+      },
+      axisBase: {
+        color: cMuted,
+        gridcolor: cBorder,
+        linecolor: cBorder,
+        zerolinecolor: cMuted,
+      },
+      cfg: {
+        responsive: true,
+        displayModeBar: true,
+        modeBarButtonsToRemove: ['lasso2d','select2d'],
+        toImageButtonOptions: { format: 'png', scale: 2 },
+      },
+      // Donut and gauge are pure displays — skip listeners and mode bar
+      cfgStatic: { responsive: true, staticPlot: true, displayModeBar: false },
+    };
+  }
+  return chrome;
+}
+
 function renderShapPlots(modelName, shapData, params) {
-  /* shapData = { featureCode: shapValue, ... } sorted by |val| desc */
-
-  // ── Read live CSS custom-property values for full dark-mode compatibility ──
-  const cs       = getComputedStyle(document.documentElement);
-  const cRed     = cs.getPropertyValue('--c-red').trim()       || '#e63946';
-  const cPrimary = cs.getPropertyValue('--c-primary').trim()   || '#1B6CA8';
-  const cAccent  = cs.getPropertyValue('--c-accent').trim()    || '#00C9B8';
-  const cSurface = cs.getPropertyValue('--surface').trim()     || '#ffffff';
-  const cSurf2   = cs.getPropertyValue('--surface-2').trim()   || '#f7f9fb';
-  const cBg      = cs.getPropertyValue('--bg').trim()          || '#f0f4f8';
-  const cBorder  = cs.getPropertyValue('--border').trim()      || '#dce3ea';
-  const cText    = cs.getPropertyValue('--text').trim()        || '#1a2332';
-  const cMuted   = cs.getPropertyValue('--text-muted').trim()  || '#6b7a8d';
-  const cPriDark = cs.getPropertyValue('--c-primary-dark').trim() || '#124e7c';
+  /* shapData = { featureCode: shapValue, ... } sorted by |val| desc.
+     Plots use Plotly.react so the plot divs keep a stable identity:
+     switching models diffs the existing figure instead of tearing the
+     SVG down and rebuilding it from scratch. */
+
+  // ── Theme palette (memoized) for full dark-mode compatibility ──
+  const { cRed, cPrimary, cAccent, cSurf2, cBorder, cText, cMuted, cPriDark } = _cssPalette();
   // Semantic colours
   const colRisk  = cRed;       // feature increases CKD risk
   const colProt  = cPrimary;   // feature decreases CKD risk (protective)
@@ -693,35 +797,20 @@ function renderShapPlots(modelName, shapData, params) {
     (FEAT_LABEL[a[0]] || a[0]).localeCompare(FEAT_LABEL[b[0]] || b[0])).slice(0, 15);
   const alphaLabels = alpha.map(([k]) => FEAT_LABEL[k] || k);
   const alphaValues = alpha.map(([, v]) => v);
-  const netShap = allEntries.reduce((s, [, v]) => s + v, 0);
-
-  // Risk vs protective sums
-  const riskSum = allEntries.filter(([, v]) => v > 0).reduce((s, [, v]) => s + v, 0);
-  const protSum = allEntries.filter(([, v]) => v < 0).reduce((s, [, v]) => s + Math.abs(v), 0);
-
-  // Shared Plotly layout base using live CSS vars
-  const layoutBase = {
-    paper_bgcolor: 'rgba(0,0,0,0)', // fully transparent — card provides background
-    plot_bgcolor:  cSurf2,
-    font: { family: 'Inter, system-ui, sans-serif', size: 12, color: cText },
-    margin: { t: 30, r: 80, b: 60, l: 170 },
-  };
-  const axisBase = {
-    color: cMuted,
-    gridcolor: cBorder,
-    linecolor: cBorder,
-    zerolinecolor: cMuted,
-  };
-  const cfg = {
-    responsive: true,
-    displayModeBar: true,
-    modeBarButtonsToRemove: ['lasso2d','select2d'],
-    toImageButtonOptions: { format: 'png', scale: 2 },
-  };
-  const plotTransition = { duration: 500, easing: 'cubic-in-out' };
+
+  // Net, risk, and protective sums in a single pass over the entries
+  let netShap = 0, riskSum = 0, protSum = 0;
+  for (const [, v] of allEntries) {
+    netShap += v;
+    if (v > 0) riskSum += v;
+    else protSum -= v;
+  }
+
+  // Shared Plotly layout/config chrome (memoized per theme)
+  const { layoutBase, axisBase, cfg, cfgStatic } = _plotChrome();
 
   // ── PLOT 1 — Feature Impact bar chart ────────────────────────────
-  Plotly.newPlot('shap-plot1', [{
+  Plotly.react('shap-plot1', [{
     type: 'bar', orientation: 'h',
     y: topLabels, x: topValues,
     marker: { color: topColors },
@@ -737,8 +826,8 @@ function renderShapPlots(modelName, shapData, params) {
     shapes: [{ type:'line', x0:0, x1:0, y0:-0.5, y1:top.length-0.5, line:{ color:cMuted, width:1.5, dash:'dot' } }],
   }, cfg);
 
-  // ── PLOT 2 — Waterfall chart ───────────────────────────────────
-  Plotly.newPlot('shap-plot2', [{
+  // ── PLOT 2 — Waterfall chart (lazy) ────────────────────────────
+  _queueLazyPlot('shap-plot2', () => Plotly.react('shap-plot2', [{
     type: 'waterfall', orientation: 'v',
     x: [...alphaLabels, 'Net SHAP Score'],
     y: [...alphaValues, netShap],
@@ -757,12 +846,13 @@ function renderShapPlots(modelName, shapData, params) {
     margin: { ...layoutBase.margin, l: 60, b: 120 },
     xaxis: { ...axisBase, tickangle: -40, automargin: true },
     yaxis: { ...axisBase, title: { text: 'Cumulative SHAP contribution', font: { color: cMuted } }, zeroline: true },
-  }, cfg);
+  }, cfg));
 
-  // ── PLOT 3 — Donut: Risk vs Protective ─────────────────────────
+  // ── PLOT 3 — Donut: Risk vs Protective (lazy) ──────────────────
   const donutLabel = netShap >= 0 ? '❌ At Risk' : '✅ Protected';
   const donutColor = netShap >= 0 ? colRisk : colProt;
-  Plotly.newPlot('shap-plot3', [{
+  _queueLazyPlot('shap-plot3', () => {
+  Plotly.react('shap-plot3', [{
     type: 'pie', hole: 0.55,
     labels: ['Protective Features', 'Risk Features'],
     values: [protSum, riskSum],
@@ -777,14 +867,18 @@ function renderShapPlots(modelName, shapData, params) {
     margin: { t: 20, r: 20, b: 60, l: 20 },
     legend: { orientation: 'h', y: -0.20, font: { color: cText, size: 11 }, xanchor: 'center', x: 0.5 },
     annotations: [{ text: `<b>${donutLabel}</b>`, showarrow: false, font: { size: 13, color: donutColor }, x: 0.5, y: 0.5, xref: 'paper', yref: 'paper', xanchor: 'center', yanchor: 'middle' }],
-  }, cfg);
+  }, cfgStatic);
+  // Snap to container width once drawn
+  setTimeout(() => Plotly.Plots.resize('shap-plot3'), 50);
+  });
 
-  // ── PLOT 4 — Risk-o-Meter gauge ──────────────────────────────
+  // ── PLOT 4 — Risk-o-Meter gauge (lazy) ───────────────────────
   const ensConf    = STATE.lastPrediction?.ensemble_confidence || 0;
   const ensResult  = STATE.lastPrediction?.ensemble_result || 'no_ckd';
   const gaugeValue = Math.round(ensConf * 100);
   const gaugeColor = ensResult === 'ckd' ? colRisk : colProt;
-  Plotly.newPlot('shap-plot4', [{
+  _queueLazyPlot('shap-plot4', () => {
+  Plotly.react('shap-plot4', [{
     type: 'indicator',
     domain: { x: [0.05, 0.95], y: [0.05, 0.9] },
     mode: 'gauge+number+delta',
@@ -817,23 +911,25 @@ function renderShapPlots(modelName, shapData, params) {
       { text:'High',     x:0.77, y:0.27, xref:'paper', yref:'paper', showarrow:false, font:{size:9,color:cMuted} },
       { text:'Critical', x:0.94, y:0.10, xref:'paper', yref:'paper', showarrow:false, font:{size:9,color:cMuted} },
     ],
-  }, cfg);
+  }, cfgStatic);
+  // Snap to container width once drawn
+  setTimeout(() => Plotly.Plots.resize('shap-plot4'), 50);
+  });
 
-  // Force responsive resize so both plots snap to container width
-  setTimeout(() => { Plotly.Plots.resize('shap-plot3'); Plotly.Plots.resize('shap-plot4'); }, 50);
-  // ── PLOT 5 — Patient values vs normal ranges ──────────────────────
+  // ── PLOT 5 — Patient values vs normal ranges (lazy) ───────────────
   const p5Features = Object.keys(CLINICAL_RANGES).filter(k => params[k] !== undefined && params[k] !== '');
   const p5Labels   = p5Features.map(k => CLINICAL_RANGES[k].label);
+  const p5Nums     = numericParams(params);
   const p5Devs     = p5Features.map(k => {
     const r   = CLINICAL_RANGES[k];
-    const val = parseFloat(params[k]);
+    const val = p5Nums[k];
     const mid = (r.min + r.max) / 2;
     const half = (r.max - r.min) / 2;
     return half > 0 ? Math.round(((val - mid) / half) * 1000) / 10 : 0;
   });
   const p5Colors = p5Devs.map(d => Math.abs(d) > 100 ? colRisk : colProt);
 
-  Plotly.newPlot('shap-plot5', [
+  _queueLazyPlot('shap-plot5', () => Plotly.react('shap-plot5', [
     { type:'scatter', mode:'lines', name:'', showlegend:false, hoverinfo:'skip',
       x:[-0.5, p5Labels.length-0.5], y:[100,100],
       line:{ color:colRisk, dash:'dot', width:1.5 } },
@@ -856,7 +952,7 @@ function renderShapPlots(modelName, shapData, params) {
     yaxis: { ...axisBase, title:{ text:'Deviation from Normal Range Mid-point (%)', font:{color:cMuted} }, zeroline:true },
     legend: { orientation:'h', y:-0.25, font:{ color:cText } },
     annotations: [{ text:'Normal Range', x:0.01, y:0.56, xref:'paper', yref:'paper', showarrow:false, font:{ size:10, color:colProt } }],
-  }, cfg);
+  }, cfg));
 
   // ── Clinical Interpretation (theme-class HTML) ──────────────────────
   const riskDrivers = sorted.filter(([, v]) => v > 0).slice(0, 4);
@@ -866,54 +962,55 @@ function renderShapPlots(modelName, shapData, params) {
     ? 'pushing the model <em>toward CKD</em>. The higher this value, the greater the kidney stress signal.'
     : '<em>reducing</em> CKD likelihood in this prediction.';
 
-  let html = `<h4 class="section-title">📄 Clinical Interpretation</h4>`;
+  // Collected into an array and joined once — avoids quadratic rebuilds
+  // from repeated string concatenation on long risk lists
+  const parts = [`<h4 class="section-title">📄 Clinical Interpretation</h4>`];
 
   if (riskDrivers.length) {
-    html += `<p class="params-section-title" style="margin-top:.75rem">🔴 Top Risk Drivers</p>`;
+    parts.push(`<p class="params-section-title" style="margin-top:.75rem">🔴 Top Risk Drivers</p>`);
     for (const [code, val] of riskDrivers) {
       const lbl = FEAT_LABEL[code] || code;
       const nrt = nrText(code);
-      html += `<div class="shap-interp-row risk">
+      parts.push(`<div class="shap-interp-row risk">
         <span class="shap-interp-val risk">${val >= 0 ? '+' : ''}${val.toFixed(4)}</span>
         <span><b>${lbl}</b>${nrt ? ` <span class="muted-text">(${nrt})</span>` : ''} — This feature is ${direction(val)}</span>
-      </div>`;
+      </div>`);
     }
   }
 
   if (protFactors.length) {
-    html += `<p class="params-section-title" style="margin-top:.75rem">🟢 Top Protective Factors</p>`;
+    parts.push(`<p class="params-section-title" style="margin-top:.75rem">🟢 Top Protective Factors</p>`);
     for (const [code, val] of protFactors) {
       const lbl = FEAT_LABEL[code] || code;
-      html += `<div class="shap-interp-row protective">
+      parts.push(`<div class="shap-interp-row protective">
         <span class="shap-interp-val protective">${val.toFixed(4)}</span>
         <span><b>${lbl}</b> — This feature is ${direction(val)}</span>
-      </div>`;
+      </div>`);
     }
   }
 
   const netEffect = netShap >= 0 ? 'a <b>net risk effect</b>' : 'a <b>net protective effect</b>';
   const netIcon   = netShap >= 0 ? '🚨' : '✅';
-  html += `<div class="shap-net-banner">
+  parts.push(`<div class="shap-net-banner">
     ${netIcon}
     <div><b>Net SHAP Score:
       <span class="shap-interp-val ${netShap >= 0 ? 'risk' : 'protective'}">${netShap >= 0 ? '+' : ''}${netShap.toFixed(4)}</span></b>
       — The combined SHAP signal shows ${netEffect} for this patient according to the <em>${modelName}</em> model.
     </div>
-  </div>`;
+  </div>`);
 
-  html += `<div class="shap-legend">
+  parts.push(`<div class="shap-legend">
     <span><span class="shap-legend-dot" style="background:${colRisk}"></span> Risk feature (increases CKD probability)</span>
     <span><span class="shap-legend-dot" style="background:${colProt}"></span> Protective feature (decreases CKD probability)</span>
     <span class="muted-text">Bar length = strength of influence &nbsp;·&nbsp; Model: ${modelName}</span>
-  </div>`;
+  </div>`);
 
-  document.getElementById('shap-clinical-card').innerHTML = html;
+  document.getElementById('shap-clinical-card').innerHTML = parts.join('');
 
   // ── Submitted Parameters (theme-class HTML) ──────────────────────
   const fmt = (v) => {
     if (v === null || v === undefined || v === '') return '—';
-    const map = { normal:'Normal', abnormal:'Abnormal', present:'Present', notpresent:'Not Present', yes:'Yes', no:'No', good:'Good', poor:'Poor' };
-    return map[String(v).toLowerCase()] ?? v;
+    return VALUE_DISPLAY[String(v).toLowerCase()] ?? v;
   };
   const pRow = (label, val) => `<p class="shap-params-item">${label}: <span>${fmt(val)}</span></p>`;
 
@@ -960,6 +1057,33 @@ function renderShapPlots(modelName, shapData, params) {
   document.getElementById('shap-section')?.scrollIntoView({ behavior: 'smooth', block: 'start' });
 }
 
+/* Defers a plot build until its container first scrolls near the viewport.
+   Plot 1 is drawn eagerly; plots 2–5 cost nothing until the clinician
+   actually scrolls down to them. Falls back to an immediate build when
+   IntersectionObserver is unavailable. */
+const _lazyPlotBuilders = new Map();   // divId → build()
+let _lazyPlotObserver = null;
+
+function _queueLazyPlot(divId, build) {
+  const el = document.getElementById(divId);
+  if (!el || !('IntersectionObserver' in window)) { build(); return; }
+  if (!_lazyPlotObserver) {
+    _lazyPlotObserver = new IntersectionObserver((entries) => {
+      for (const entry of entries) {
+        if (!entry.isIntersecting) continue;
+        const builder = _lazyPlotBuilders.get(entry.target.id);
+        if (builder) {
+          _lazyPlotBuilders.delete(entry.target.id);
+          builder();
+        }
+        _lazyPlotObserver.unobserve(entry.target);
+      }
+    }, { rootMargin: '200px' });
+  }
+  _lazyPlotBuilders.set(divId, build);
+  _lazyPlotObserver.observe(el);
+}
+
 /* Stagger-animates every .shap-plot-card inside #shap-section into view */
 function _animateShapCards() {
   const cards = Array.from(document.querySelectorAll('#shap-section .shap-plot-card'));
@@ -988,7 +1112,15 @@ async function loadPatients() {
   }
 }
 
+// Debounced: the search box fires per keystroke, but filtering and
+// rebuilding the table only runs once typing pauses.
+let _filterPatientsTimer = null;
 function filterPatients() {
+  clearTimeout(_filterPatientsTimer);
+  _filterPatientsTimer = setTimeout(_filterPatientsNow, 150);
+}
+
+function _filterPatientsNow() {
   const q = document.getElementById('patient-search').value.toLowerCase();
   const filtered = STATE.patientsCache.filter(p =>
     (p.first_name + ' ' + p.last_name).toLowerCase().includes(q) ||
@@ -998,15 +1130,39 @@ function filterPatients() {
   renderPatientsTable(filtered, document.getElementById('patients-table-wrap'));
 }
 
-function renderPatientsTable(patients, wrap) {
+// Page size for the registry table — keeps the DOM bounded as the
+// patient table grows instead of rendering every row on each filter.
+const PATIENTS_PAGE_SIZE = 50;
+
+function patientsPage(delta) {
+  renderPatientsTable(STATE._patientsView || STATE.patientsCache,
+    document.getElementById('patients-table-wrap'),
+    (STATE._patientsPage || 0) + delta);
+}
+
+function renderPatientsTable(patients, wrap, page = 0) {
   if (!wrap) return;
   if (!patients.length) { wrap.innerHTML = '<p class="muted-text">No patients found.</p>'; return; }
 
+  const pages = Math.ceil(patients.length / PATIENTS_PAGE_SIZE);
+  page = Math.min(Math.max(page, 0), pages - 1);
+  STATE._patientsView = patients;
+  STATE._patientsPage = page;
+  const start = page * PATIENTS_PAGE_SIZE;
+  const slice = patients.slice(start, start + PATIENTS_PAGE_SIZE);
+
+  const pager = pages > 1 ? `
+    <div style="display:flex;align-items:center;gap:.75rem;margin-top:.75rem">
+      <button class="btn btn-ghost btn-sm" onclick="patientsPage(-1)" ${page === 0 ? 'disabled' : ''}>← Prev</button>
+      <span class="muted-text" style="font-size:.8rem">Showing ${start + 1}–${start + slice.length} of ${patients.length}</span>
+      <button class="btn btn-ghost btn-sm" onclick="patientsPage(1)" ${page >= pages - 1 ? 'disabled' : ''}>Next →</button>
+    </div>` : '';
+
   wrap.innerHTML = `<table>
     <thead><tr>
       <th>Patient ID</th><th>Name</th><th>Age</th><th>Gender</th><th>Physician</th><th>Registered</th><th>Actions</th>
     </tr></thead>
-    <tbody>${patients.map(p => `
+    <tbody>${slice.map(p => `
       <tr>
         <td class="mono" style="font-size:.78rem">${p.patient_id}</td>
         <td><strong>${p.first_name} ${p.last_name}</strong></td>
@@ -1021,7 +1177,7 @@ function renderPatientsTable(patients, wrap) {
         </td>
       </tr>`).join('')}
     </tbody>
-  </table>`;
+  </table>${pager}`;
 }
 
 async function viewPatient(patientId) {
@@ -1119,16 +1275,38 @@ function showHistoryDetail(h) {
 }
 
 // ── Re-run Analysis for an existing patient ─────────────────────────────────
+// pid → row index over the registry cache, rebuilt only when the cache
+// array itself is replaced — repeat lookups stay O(1) across renders
+let _patientsIndexSource = null;
+let _patientsIndex = null;
+function patientById(pid) {
+  if (_patientsIndexSource !== STATE.patientsCache) {
+    _patientsIndexSource = STATE.patientsCache;
+    _patientsIndex = new Map(STATE.patientsCache.map(p => [p.patient_id, p]));
+  }
+  return _patientsIndex.get(pid);
+}
+
 async function startReanalysis(patientId) {
   showToast('Loading patient…');
   try {
-    const [pRes, hRes] = await Promise.all([
-      api(`/api/patients/${patientId}`),
-      api(`/api/patients/${patientId}/history`),
-    ]);
-    if (pRes.status !== 'success') { showToast('Patient not found.', 'error'); return; }
-
-    const p = pRes.patient;
+    // The registry cache already holds everything this flow needs
+    // (name, id, age) — skip the patient-detail round-trip when present
+    const cached = patientById(patientId);
+    let p;
+    let hRes;
+    if (cached) {
+      p = cached;
+      hRes = await api(`/api/patients/${patientId}/history`);
+    } else {
+      const [pRes, h] = await Promise.all([
+        api(`/api/patients/${patientId}`),
+        api(`/api/patients/${patientId}/history`),
+      ]);
+      if (pRes.status !== 'success') { showToast('Patient not found.', 'error'); return; }
+      p = pRes.patient;
+      hRes = h;
+    }
     STATE.currentPatient = p;
 
     // Update Step-2 patient banner
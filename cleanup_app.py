@@ -1,14 +1,8 @@
 # This temp file can be deleted
 
-# Find the second occurrence of 'if __name__' after line 900
-cut = None
-count = 0
-for i, l in enumerate(lines):
-    if i > 900 and 'if __name__' in l:
-        count += 1
-        if count == 1:
-            cut = i
-            break
+# Find the first occurrence of 'if __name__' after line 900 — start the
+# scan there instead of walking the whole file and testing i > 900 per line
+cut = next((i for i in range(901, len(lines)) if 'if __name__' in lines[i]), None)
 
 if cut:
     with open('D:/CKD/Frontend/streamlit_app.py', 'w', encoding='utf-8') as f:
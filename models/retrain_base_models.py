@@ -9,7 +9,9 @@ Run from the project root:
 import os, sys, pickle
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.impute import KNNImputer
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.tree import DecisionTreeClassifier
@@ -24,10 +26,12 @@ RANDOM_STATE = 42
 # ── 1. Load data ──────────────────────────────────────────────────────────────
 df = pd.read_csv(DATA_PATH)
 df = df.drop(columns=['id'], errors='ignore')
-for col in df.select_dtypes(include='object').columns:
-    df[col] = df[col].str.strip()
+# Batched strip across all object columns in one assignment, and a single
+# regex pass over classification instead of chained lower/replace copies
+obj_cols = df.select_dtypes(include='object').columns
+df[obj_cols] = df[obj_cols].apply(lambda s: s.str.strip())
 
-df['classification'] = df['classification'].str.lower().str.replace(' ', '')
+df['classification'] = df['classification'].str.replace(r'\s+', '', regex=True).str.lower()
 y   = (df['classification'] == 'ckd').astype(int).values
 X_raw = df.drop(columns=['classification'])
 
@@ -52,10 +56,12 @@ else:
         pickle.dump(le_dict, f)
     print('Created and saved le_dict.pkl')
 
+# Vectorized encoding: one .map() per column against a prebuilt class→code
+# dict instead of a per-row le.transform() call. NaNs pass through as NaN.
 X_enc = X_raw.copy()
 for col in categorical_cols:
-    le = le_dict[col]
-    X_enc[col] = X_enc[col].apply(lambda v: le.transform([v])[0] if pd.notna(v) else np.nan)
+    mapping = {cls: i for i, cls in enumerate(le_dict[col].classes_)}
+    X_enc[col] = X_raw[col].map(mapping).astype(float)
 
 # ── 3. KNN Impute ─────────────────────────────────────────────────────────────
 imp_path = os.path.join(MODELS_DIR, 'knn_imputer.pkl')
@@ -85,6 +91,16 @@ else:
         pickle.dump(scaler, f)
     print('Created and saved scaler.pkl')
 
+# Fused imputer → scaler pipeline: the app loads one pickle and the two
+# numeric steps share a single object. Label encoding stays separate —
+# the frontend applies alias normalization before it that a sklearn
+# transformer can't express. The individual pickles are still written
+# above for backward compatibility.
+pipe_path = os.path.join(MODELS_DIR, 'preprocess_pipeline.pkl')
+with open(pipe_path, 'wb') as f:
+    pickle.dump(Pipeline([('imputer', knn_imp), ('scaler', scaler)]), f)
+print('Saved preprocess_pipeline.pkl (imputer → scaler)')
+
 # ── 5. Train & save base models ───────────────────────────────────────────────
 BASE_MODELS = {
     'lr_notebook':  LogisticRegression(max_iter=1000, C=1.0, random_state=RANDOM_STATE),
@@ -93,9 +109,17 @@ BASE_MODELS = {
     'nb_notebook':  GaussianNB(),
 }
 
-print('\nTraining base models on notebook pipeline data...')
-for name, clf in BASE_MODELS.items():
+def _fit(name, clf):
     clf.fit(X_scaled, y)
+    return name, clf
+
+
+print('\nTraining base models on notebook pipeline data...')
+# The four fits are independent — run them across processes
+fitted = dict(Parallel(n_jobs=-1, backend='loky')(
+    delayed(_fit)(name, clf) for name, clf in BASE_MODELS.items()
+))
+for name, clf in fitted.items():
     preds = clf.predict(X_scaled)
     probs = clf.predict_proba(X_scaled)[:, 1]
     acc   = accuracy_score(y, preds)
@@ -11,12 +11,12 @@ DATA_PATH = '../data/raw.csv'
 TARGET_COLUMN = 'classification' 
 
 # Preprocessing
-X, y = preprocess_data(DATA_PATH , TARGET_COLUMN)
+X, y, preprocessor = preprocess_data(DATA_PATH , TARGET_COLUMN)
 
 print(y)
 
 #train the models
 trained_models = define_and_train_models(X, y)
 
-#save the models
-save_models(trained_models, models_dir="../models/")
\ No newline at end of file
+#save the models (and the fitted preprocessor for inference)
+save_models(trained_models, models_dir="../models/", preprocessor=preprocessor)
\ No newline at end of file
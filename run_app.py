@@ -1,8 +1,9 @@
 """
 CKD Prediction System - Application Runner
-Starts both Flask API and Streamlit frontend
+Starts the Flask server (API + web UI)
 """
 
+import socket
 import subprocess
 import sys
 import time
@@ -10,73 +11,76 @@ import webbrowser
 import os
 from pathlib import Path
 
+
+def wait_port(port, timeout=15):
+    """Block until something is listening on 127.0.0.1:port (True) or timeout (False)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
 def main():
-    """Start both Flask API and Streamlit frontend"""
-    
+    """Start the Flask server and open the UI once it is ready"""
+
     # Get the project root directory
     project_root = Path(__file__).parent
     frontend_dir = project_root / "Frontend"
-    
+
     print("=" * 50)
     print("  CKD Clinical Diagnosis System")
     print("=" * 50)
     print()
-    
+
     # Change to Frontend directory
     os.chdir(frontend_dir)
-    
-    print("Starting Flask API server...")
-    
-    # Start Flask API
+
+    print("Starting Flask server...")
+
+    # Start Flask (serves both the API and the web UI)
     flask_process = subprocess.Popen(
         [sys.executable, "app.py"],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         creationflags=subprocess.CREATE_NEW_CONSOLE if sys.platform == "win32" else 0
     )
-    
-    # Wait for Flask to initialize
-    time.sleep(3)
-    
-    print("Starting Streamlit frontend...")
-    
-    # Start Streamlit
-    streamlit_process = subprocess.Popen(
-        [sys.executable, "-m", "streamlit", "run", "streamlit_app.py", "--server.port", "8501"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        creationflags=subprocess.CREATE_NEW_CONSOLE if sys.platform == "win32" else 0
-    )
-    
+
+    # Probe for the actual bind instead of sleeping a fixed 3 seconds
+    if not wait_port(5000):
+        print("Flask did not come up within 15s — check Frontend/app.py logs.")
+        flask_process.terminate()
+        sys.exit(1)
+
     print()
     print("=" * 50)
-    print("  Servers are starting...")
+    print("  Server is running")
     print("=" * 50)
     print()
-    print("  Flask API:     http://127.0.0.1:5000")
-    print("  Streamlit UI:  http://127.0.0.1:8501")
+    print("  Flask API + UI:  http://127.0.0.1:5000")
     print()
     print("  Login Credentials:")
     print("  Username: admin")
     print("  Password: admin123")
     print()
     print("=" * 50)
-    
-    # Wait and open browser
-    time.sleep(5)
-    webbrowser.open("http://127.0.0.1:8501")
-    
-    print("\nPress Ctrl+C to stop both servers...")
-    
+
+    # The readiness probe above already confirmed the server is listening,
+    # so the tab can open immediately
+    webbrowser.open("http://127.0.0.1:5000")
+
+    print("\nPress Ctrl+C to stop the server...")
+
     try:
-        # Keep running until interrupted
-        while True:
-            time.sleep(1)
+        # Block on the child instead of polling once a second
+        flask_process.wait()
     except KeyboardInterrupt:
-        print("\nShutting down servers...")
+        print("\nShutting down server...")
         flask_process.terminate()
-        streamlit_process.terminate()
-        print("Servers stopped.")
+        print("Server stopped.")
 
 
 if __name__ == "__main__":
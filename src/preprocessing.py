@@ -1,73 +1,114 @@
+import os
+
 import pandas as pd
 import numpy as np
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import FunctionTransformer
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
+from joblib import Memory
 from sklearn.base import BaseEstimator, TransformerMixin
 
+# Which lowered token maps to 1 for each binary clinical column; columns
+# not listed here fall through to category codes
+_BINARY_RULES = {
+    'rbc': 'normal', 'pc': 'normal',
+    'pcc': 'present', 'ba': 'present',
+    'appet': 'good',
+    'htn': 'yes', 'dm': 'yes', 'cad': 'yes', 'pe': 'yes', 'ane': 'yes',
+}
+
+
 class CustomCategoricalEncoder(BaseEstimator, TransformerMixin):
-    
+
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
         X = X.copy()
+        # Vectorized: one C-level lowered-equality pass per column instead
+        # of a Python callback per cell; dispatch via _BINARY_RULES rather
+        # than a per-column branch chain
         for col in X.columns:
             X[col] = X[col].fillna('missing')
-            if col in ['rbc', 'pc']:
-                X[col] = X[col].apply(lambda x: 1 if x.lower() == 'normal' else 0)
-            elif col in ['pcc', 'ba']:
-                X[col] = X[col].apply(lambda x: 1 if x.lower() == 'present' else 0)
-            elif col == 'appet':
-                X[col] = X[col].apply(lambda x: 1 if x.lower() == 'good' else 0)
-            elif col in ['htn', 'dm', 'cad', 'pe', 'ane']:
-                X[col] = X[col].apply(lambda x: 1 if x.lower() == 'yes' else 0)
+            token = _BINARY_RULES.get(col)
+            if token is not None:
+                X[col] = X[col].astype(str).str.lower().eq(token).astype(np.uint8)
             else:
                 X[col] = X[col].astype('category').cat.codes
         return X
 
+# On-disk memo for preprocessing output — repeat notebook/CLI runs on an
+# unchanged CSV load the cached arrays instead of re-running the whole
+# ColumnTransformer. Keyed on the file's mtime so edits invalidate.
+_memory = Memory(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '..', '.nephroscan_cache'), verbose=0)
+
+
+class CKDPreprocessor(BaseEstimator, TransformerMixin):
+    """Fused mean-imputer + categorical encoder over the CKD schema.
+
+    fit learns the numeric/categorical column split and per-column means;
+    transform streams any conforming frame into a float32 matrix in the
+    same numeric-then-categorical column order. The fitted object is
+    persisted by save_models so inference applies the exact training
+    transform instead of re-implementing it.
+    """
+
+    def fit(self, X, y=None):
+        self.numerical_cols_ = X.select_dtypes(include=[np.number]).columns.tolist()
+        self.categorical_cols_ = [c for c in X.columns if c not in self.numerical_cols_]
+        self.means_ = {
+            col: float(np.nanmean(X[col].to_numpy(dtype=np.float32)))
+            for col in self.numerical_cols_
+        }
+        return self
+
+    def transform(self, X):
+        n_num = len(self.numerical_cols_)
+        out = np.empty((len(X), n_num + len(self.categorical_cols_)), dtype=np.float32)
+        for i, col in enumerate(self.numerical_cols_):
+            vals = X[col].to_numpy(dtype=np.float32, copy=True)
+            mask = np.isnan(vals)
+            if mask.any():
+                vals[mask] = self.means_[col]   # mean imputation
+            out[:, i] = vals
+        encoded = CustomCategoricalEncoder().transform(X[self.categorical_cols_])
+        out[:, n_num:] = encoded.to_numpy(dtype=np.float32)
+        return out
+
+
 def preprocess_data(data_path, target_column):
+    return _preprocess_cached(data_path, target_column, os.path.getmtime(data_path))
+
+
+# The raw export marks missing values with '?' (sometimes tab-prefixed);
+# mapping them to NaN lets the numeric columns they pollute parse as
+# numbers instead of falling through to the categorical encoder
+_NA_VALUES = ['?', '\t?', '']
+
+
+def _read_csv(data_path):
+    # PyArrow parses in parallel C++; fall back to the default engine
+    # when pyarrow isn't installed
+    try:
+        return pd.read_csv(data_path, engine='pyarrow', na_values=_NA_VALUES)
+    except ImportError:
+        return pd.read_csv(data_path, na_values=_NA_VALUES)
+
+
+@_memory.cache
+def _preprocess_cached(data_path, target_column, mtime):
     # Load the dataset
-    data = pd.read_csv(data_path)
+    data = _read_csv(data_path)
     data = data.reset_index(drop=True)
     data = data.drop(columns=['id'], errors='ignore')
     data = data.dropna(subset=[target_column])
 
     # Separate features and target
     X = data.drop(columns=[target_column])
-    y = data[target_column]
-
-    # Define numerical and categorical columns
-    numerical_cols = X.select_dtypes(include=['float64', 'int64']).columns.tolist()
-    categorical_cols = X.select_dtypes(include=['object']).columns.tolist()
-
-    # Define preprocessing for numerical features
-    numerical_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='mean'))
-    ])
-
-    # Define preprocessing for categorical features
-    categorical_transformer = Pipeline(steps=[
-        ('encoder', CustomCategoricalEncoder())
-    ])
-
-    # Combine transformers into a single preprocessor
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', numerical_transformer, numerical_cols),
-            ('cat', categorical_transformer, categorical_cols)
-        ]
-    )
-
-    # Create the pipeline
-    pipeline = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('target_encoder', FunctionTransformer(lambda y: y.apply(lambda x: 0 if x == "notckd" else 1), validate=False))
-    ])
-
-    # Apply pipeline
-    X_processed = pipeline.named_steps['preprocessor'].fit_transform(X)
-    y_encoded = pipeline.named_steps['target_encoder'].transform(y)
-
-    return X_processed, y_encoded
+
+    # Single fused pass through the fitted preprocessor; the object comes
+    # back to the caller so save_models can persist it for inference
+    preprocessor = CKDPreprocessor().fit(X)
+    X_processed = preprocessor.transform(X)
+
+    y_encoded = (data[target_column].to_numpy() != 'notckd').astype(np.int8)
+
+    return X_processed, y_encoded, preprocessor